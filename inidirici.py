@@ -9,9 +9,19 @@ import logging
 import re
 import threading
 from queue import Queue
+from collections import deque
 import random
 import json
+import hashlib
+import socket
+import shutil
+from functools import lru_cache
+from contextlib import contextmanager
+from typing import Optional, Set, Tuple
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 
 # Log yapılandırması
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='web_downloader.log')
@@ -22,139 +32,521 @@ DEFAULT_HEADERS = {
 }
 
 # Desteklenen dosya uzantıları
-RESOURCE_TYPES = [
+RESOURCE_TYPES = frozenset({
     '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.woff', '.woff2',
     '.ttf', '.eot', '.otf', '.ico', '.mp4', '.webm', '.ogg', '.mp3', '.wav', '.pdf'
-]
+})
+
+# Kaynak içeren etiketler ve kaynak adresini taşıyan öznitelikleri
+RESOURCE_TAGS = {
+    'img': 'src',
+    'script': 'src',
+    'link': 'href',
+    'a': 'href',
+    'video': 'src',
+    'audio': 'src',
+    'source': 'src'
+}
+
+# Dosya isimlerinde izin verilmeyen karakterler
+_SANITIZE_RE = re.compile(r'[\\/*?:"<>|]')
+
+# Aynı şablondan gelen sayfalarda tekrar eden URL'ler için önbellekli ayrıştırıcılar
+_urlparse = lru_cache(maxsize=16384)(urlparse)
+_urljoin = lru_cache(maxsize=16384)(urljoin)
+
+# İndirme ve HTML tarama iş parçacıkları için yığın boyutu. Yığın sayfaları ancak
+# kullanıldıkça bellekte yer tutar; bu ayar yalnızca iş parçacığı başına ayrılan adres
+# alanını (Linux'ta varsayılan 8 MB) küçültür. 1 MB, iç içe sayfaların ayrıştırılmasına yeter.
+WORKER_STACK_SIZE = 1024 * 1024
+
+# Yanıt gövdesinden her seferinde okunacak parça boyutu
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Dosya yazımlarını tek bir write(2) çağrısında birleştirmek için tampon boyutu
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Kaynakların ETag/Last-Modified bilgilerinin tutulduğu dosya (kayıt dizini içinde)
+INDEX_FILENAME = '.inidirici-index.json'
+
+# DNS önbelleğinde tutulacak en fazla kayıt sayısı
+DNS_CACHE_SIZE = 1024
+
+class BatchQueue:
+    """Öğelerin toplu eklendiği, tek bir koşul değişkeniyle korunan kuyruk.
+
+    Bir sayfadaki tüm kaynaklar tek seferde eklenir; iş parçacıkları ise öğeleri
+    tek tek alır, böylece boşta kalan hiçbir iş parçacığı sıra beklemez.
+    """
+
+    def __init__(self):
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._unfinished = 0
+        self._closed = False
+
+    def put_many(self, items):
+        items = list(items)
+        if not items:
+            return
+        with self._cond:
+            self._items.extend(items)
+            self._unfinished += len(items)
+            self._cond.notify_all()
+
+    def get(self):
+        """Sıradaki öğeyi döner; kuyruk kapatılıp boşaldığında None döner."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def task_done(self):
+        with self._cond:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._cond.notify_all()
+
+    def join(self):
+        with self._cond:
+            while self._unfinished > 0:
+                self._cond.wait()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
 
 # İndirme kuyruk yönetimi
-download_queue = Queue()
+download_queue = BatchQueue()
+
+# Taranacak HTML sayfalarının (url, derinlik) kuyruğu
+html_queue: 'Queue[Tuple[Optional[str], Optional[int]]]' = Queue()
+
+class HostThrottle:
+    """Her sunucu için ayrı eşzamanlılık sınırı ve istekler arası gecikme uygular.
+
+    Gecikme, iş parçacığını uyutup diğer sunuculara giden işleri bekletmek yerine
+    sunucu başına "bir sonraki izinli istek zamanı" tutularak uygulanır.
+    """
+
+    def __init__(self, per_host, delay):
+        self._per_host = per_host
+        self._delay = delay
+        self._semaphores = {}
+        self._next_ok = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url, paced=False):
+        """URL'nin sunucusu için bir istek hakkı alır; paced ise gecikmeye uyar."""
+        host = _urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.Semaphore(self._per_host)
+        # Gecikme beklenirken sunucunun eşzamanlılık hakkı boşa tutulmaz
+        if paced and self._delay > 0:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_ok.get(host, now))
+                self._next_ok[host] = start + self._delay
+            if start > now:
+                time.sleep(start - now)
+        with semaphore:
+            yield
+
+class VisitedSet:
+    """Ziyaret edilen URL'leri tam metin yerine 16 baytlık özetleri ile saklar."""
+
+    def __init__(self):
+        self._digests = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+    def __contains__(self, url):
+        return self._digest(url) in self._digests
+
+    def add_if_new(self, url):
+        """URL daha önce görülmediyse ekler ve True döner; iş parçacığı güvenlidir."""
+        digest = self._digest(url)
+        with self._lock:
+            if digest in self._digests:
+                return False
+            self._digests.add(digest)
+            return True
+
+@lru_cache(maxsize=4096)
+def _path_ext(path):
+    """Yolun küçük harfe çevrilmiş uzantısını döner."""
+    return os.path.splitext(path)[1].lower()
+
+class ResourceIndex:
+    """Önceki indirmelerin doğrulayıcılarını saklar; koşullu istekler için kullanılır."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self._entries = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"İndeks dosyası okunamadı: {self.path} - Hata: {e}")
+
+    def save(self):
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump(entries, file)
+        except OSError as e:
+            logging.error(f"İndeks dosyası yazılamadı: {self.path} - Hata: {e}")
+
+    def conditional_headers(self, url, save_path):
+        """Dosya diskte kayıttaki boyutla duruyorsa If-None-Match/If-Modified-Since başlıklarını döner.
+
+        Boyutu tutmayan dosya bozuk ya da değişmiş sayılır ve koşulsuz yeniden indirilir.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+        try:
+            if os.path.getsize(save_path) != entry.get('size'):
+                return {}
+        except OSError:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('lm'):
+            headers['If-Modified-Since'] = entry['lm']
+        return headers
+
+    def update(self, url, response_headers, size):
+        etag = response_headers.get('etag')
+        last_modified = response_headers.get('last-modified')
+        with self._lock:
+            if etag or last_modified:
+                self._entries[url] = {'etag': etag, 'lm': last_modified, 'size': size}
+            else:
+                self._entries.pop(url, None)
+
+class ContentStore:
+    """Aynı içeriğe sahip dosyaları ilk kopyaya sabit bağlantı (hardlink) vererek bir kez saklar."""
+
+    def __init__(self):
+        self._paths = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def _record(self, path, digest):
+        """Yolun artık verilen içeriği taşıdığını kaydeder; eski içeriğin kaydını düşürür."""
+        old_digest = self._digests.get(path)
+        if old_digest is not None and old_digest != digest and self._paths.get(old_digest) == path:
+            del self._paths[old_digest]
+        self._digests[path] = digest
+        self._paths.setdefault(digest, path)
+
+    def commit(self, digest, part_path, save_path):
+        """Geçici dosyayı yerine taşır; içerik daha önce kaydedildiyse bağlantı kurar.
+
+        Dosya bağlantı olarak kaydedildiyse True döner. Dosya işlemleri kilit altında
+        yapılır; böylece bağlanılan yol o anda gerçekten aynı içeriği taşır.
+        """
+        with self._lock:
+            first_path = self._paths.get(digest)
+            if first_path is not None and first_path != save_path and self._digests.get(first_path) == digest:
+                link_path = save_path + '.link'
+                try:
+                    os.link(first_path, link_path)
+                    os.replace(link_path, save_path)
+                    os.remove(part_path)
+                    self._record(save_path, digest)
+                    return True
+                except OSError as e:
+                    logging.warning(f"Sabit bağlantı kurulamadı: {save_path} - Hata: {e}")
+                    if os.path.exists(link_path):
+                        os.remove(link_path)
+
+            os.replace(part_path, save_path)
+            self._record(save_path, digest)
+            return False
 
-def sanitize_filename(filename):
+class ProgressWriter:
+    """Yazılan baytları ilerleme çubuğuna ve içerik özetine bildiren dosya sarmalayıcısı."""
+
+    def __init__(self, file, bar, hasher):
+        self._file = file
+        self._bar = bar
+        self._hasher = hasher
+
+    def write(self, data):
+        self._hasher.update(data)
+        size = self._file.write(data)
+        self._bar.update(size)
+        return size
+
+def _is_resource_tag(tag, tags=RESOURCE_TAGS):
+    """Etiket kaynak etiketiyse ve ilgili özniteliği doluysa True döner (find_all süzgeci)."""
+    attr = tags.get(tag.name)
+    return attr is not None and bool(tag.get(attr))
+
+def sanitize_filename(filename: str) -> str:
     """Dosya isimlerindeki geçersiz karakterleri kaldırır."""
-    return re.sub(r'[\\/*?:"<>|]', "_", filename)
+    return _SANITIZE_RE.sub("_", filename)
+
+# Bu çalıştırmada oluşturulduğu bilinen dizinler; tekrar stat/mkdir çağrısını önler
+_created_dirs: Set[str] = set()
+_created_dirs_lock = threading.Lock()
 
 def make_dirs(path):
     """Verilen yolu oluşturur, mevcut değilse."""
-    os.makedirs(path, exist_ok=True)
+    if path in _created_dirs:
+        return
+    with _created_dirs_lock:
+        if path in _created_dirs:
+            return
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
 
-def is_valid_url(url):
+def is_valid_url(url: str) -> bool:
     """URL'nin geçerli olup olmadığını kontrol eder."""
-    parsed = urlparse(url)
+    parsed = _urlparse(url)
     return bool(parsed.netloc) and bool(parsed.scheme)
 
-def get_page(url, headers, timeout, verify_ssl, proxies):
-    """Verilen URL'den sayfayı alır ve döner."""
+def install_dns_cache(ttl, maxsize=DNS_CACHE_SIZE):
+    """socket.getaddrinfo sonuçlarını süreç genelinde ttl saniye boyunca önbelleğe alır."""
+    original_getaddrinfo = socket.getaddrinfo
+    cache = {}
+    lock = threading.Lock()
+
+    def cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with lock:
+            entry = cache.get(key)
+        if entry is not None and entry[0] > now:
+            return list(entry[1])
+
+        result = original_getaddrinfo(host, port, family, type, proto, flags)
+        with lock:
+            if key not in cache and len(cache) >= maxsize:
+                cache.pop(next(iter(cache)))
+            cache[key] = (now + ttl, tuple(result))
+        return result
+
+    socket.getaddrinfo = cached_getaddrinfo
+
+def create_session(headers, pool_connections, pool_maxsize, retries, trust_env=True):
+    """Bağlantı havuzlu ve yeniden denemeli ortak bir HTTP oturumu oluşturur.
+
+    trust_env kapatıldığında her istekte ortam değişkenleri ve .netrc okunmaz.
+    """
+    session = requests.Session()
+    session.trust_env = trust_env
+    session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=0.3)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_page(session, url, timeout, verify_ssl, proxies):
+    """Verilen URL'den sayfayı alır; ham gövdeyi ve başlıkta bildirilen kodlamayı döner.
+
+    Başlıkta charset yoksa requests text/html için ISO-8859-1 varsayar ve sayfadaki
+    <meta charset> bildirimini yok sayar. Bu yüzden gövde çözülmeden döndürülür ve
+    kodlamayı sayfanın kendi bildirimine (yoksa içerik tespitine) göre ayrıştırıcı belirler.
+    """
     try:
-        response = requests.get(url, headers=headers, timeout=timeout, verify=verify_ssl, proxies=proxies)
+        response = session.get(url, timeout=timeout, verify=verify_ssl, proxies=proxies)
         response.raise_for_status()
-        return response.text
+        content_type = response.headers.get('content-type', '')
+        encoding = response.encoding if 'charset' in content_type.lower() else None
+        return response.content, encoding
     except RequestException as e:
         logging.error(f"URL alınırken hata oluştu: {url} - Hata: {e}")
-        return None
+        return None, None
 
-def save_file(url, save_path, headers, timeout, verify_ssl, max_size, proxies):
-    """URL'deki dosyayı belirtilen yola kaydeder."""
+def save_file(session, url, save_path, timeout, verify_ssl, max_size, proxies, index, store):
+    """URL'deki dosyayı belirtilen yola kaydeder; değişmemişse yeniden indirmez."""
+    save_path = sanitize_filename(save_path)
     try:
-        response = requests.get(url, headers=headers, stream=True, timeout=timeout, verify=verify_ssl, proxies=proxies)
-        response.raise_for_status()
-        total_size = int(response.headers.get('content-length', 0))
-        
-        if total_size > max_size * 1024 * 1024:
-            logging.warning(f"Dosya çok büyük: {url} - Atlanıyor")
-            return False
-        
-        save_path = sanitize_filename(save_path)
-        with open(save_path, 'wb') as file, tqdm(
-            desc=save_path,
-            total=total_size,
-            unit='B',
-            unit_scale=True,
-            unit_divisor=1024,
-        ) as bar:
-            for data in response.iter_content(chunk_size=1024):
-                size = file.write(data)
-                bar.update(size)
-        logging.info(f"Dosya kaydedildi: {save_path}")
+        headers = index.conditional_headers(url, save_path)
+        with session.get(url, headers=headers, stream=True, timeout=timeout, verify=verify_ssl, proxies=proxies) as response:
+            response.raise_for_status()
+            if response.status_code == 304:
+                logging.info(f"Dosya değişmemiş: {save_path}")
+                return True
+
+            total_size = int(response.headers.get('content-length', 0))
+
+            if total_size > max_size * 1024 * 1024:
+                logging.warning(f"Dosya çok büyük: {url} - Atlanıyor")
+                return False
+
+            # Gövde, sıkıştırması çözülerek doğrudan ham akıştan dosyaya kopyalanır.
+            # Başka dosyalarla paylaşılan bir inode'u ezmemek için önce geçici dosyaya yazılır;
+            # aynı yola eşzamanlı yazan iş parçacıkları birbirinin dosyasını ezmesin diye ad tekildir.
+            response.raw.decode_content = True
+            part_path = f"{save_path}.{threading.get_ident()}.part"
+            hasher = hashlib.blake2b(digest_size=16)
+            try:
+                with open(part_path, 'wb', buffering=WRITE_BUFFER_SIZE) as file, tqdm(
+                    desc=save_path,
+                    total=total_size,
+                    unit='B',
+                    unit_scale=True,
+                    unit_divisor=1024,
+                ) as bar:
+                    shutil.copyfileobj(response.raw, ProgressWriter(file, bar, hasher), DOWNLOAD_CHUNK_SIZE)
+                linked = store.commit(hasher.digest(), part_path, save_path)
+            except BaseException:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+            # Yalnızca bu iş parçacığının yerine taşıdığı gövde kaydedilir
+            index.update(url, response.headers, bar.n)
+        if linked:
+            logging.info(f"Dosya yinelenen içerik olarak bağlandı: {save_path}")
+        else:
+            logging.info(f"Dosya kaydedildi: {save_path}")
         return True
-    except RequestException as e:
+    except (RequestException, Urllib3HTTPError) as e:
         logging.error(f"Dosya indirilemedi: {url} - Hata: {e}")
         return False
 
-def download_worker(headers, timeout, verify_ssl, max_size, proxies):
+def download_worker(session, timeout, verify_ssl, max_size, proxies, index, store, throttle):
     """İndirme işlemlerini iş parçacıkları ile yönetir."""
     while True:
-        url, save_path = download_queue.get()
-        if url is None:
+        item = download_queue.get()
+        if item is None:
             break
-        save_file(url, save_path, headers, timeout, verify_ssl, max_size, proxies)
-        download_queue.task_done()
+        url, save_path = item
+        try:
+            with throttle.slot(url):
+                save_file(session, url, save_path, timeout, verify_ssl, max_size, proxies, index, store)
+        except Exception as e:
+            logging.error(f"Dosya kaydedilirken hata oluştu: {url} - Hata: {e}")
+        finally:
+            download_queue.task_done()
+
+def _process_resource(src: str, tag: str, url: str, save_dir: str, include_types: frozenset) -> Optional[Tuple[str, str, bool]]:
+    """Kaynağın mutlak URL'sini, kayıt yolunu ve indirilecek dosya olup olmadığını döner.
+
+    Kaynak atlanacaksa None döner. Yan etkisi yoktur; derlenmeye uygun sıcak yoldur.
+    """
+    resource_url = _urljoin(url, src)
+    resource_parsed_url = _urlparse(resource_url)
+    resource_ext = _path_ext(resource_parsed_url.path)
+    is_resource = resource_ext in RESOURCE_TYPES
+
+    if include_types and resource_ext not in include_types:
+        return None
+    if not (is_resource or tag == 'a') or not is_valid_url(resource_url):
+        return None
+
+    resource_path = os.path.join(save_dir, sanitize_filename(resource_parsed_url.path.lstrip('/')))
+    return resource_url, resource_path, is_resource
 
-def parse_and_download(url, base_url, save_dir, visited, delay, max_depth, current_depth, headers, timeout, verify_ssl, max_size, include_types, proxies, follow_redirects):
+def parse_and_download(session, url, base_url, save_dir, visited, throttle, max_depth, current_depth, timeout, verify_ssl, max_size, include_types, proxies, follow_redirects, pretty):
     """Verilen URL'den kaynakları indirir ve iç bağlantıları takip eder."""
     if current_depth > max_depth:
         return
 
-    if url in visited:
+    if not visited.add_if_new(url):
         return
-    visited.add(url)
 
-    html_content = get_page(url, headers, timeout, verify_ssl, proxies)
+    with throttle.slot(url, paced=True):
+        html_content, encoding = get_page(session, url, timeout, verify_ssl, proxies)
     if html_content is None:
         return
 
-    parsed_url = urlparse(url)
+    parsed_url = _urlparse(url)
     path = parsed_url.path
     if path.endswith('/'):
         path += 'index.html'
-    elif not os.path.splitext(path)[1]:
+    elif not _path_ext(path):
         path += '/index.html'
 
     save_path = os.path.join(save_dir, path.lstrip('/'))
     make_dirs(os.path.dirname(save_path))
 
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    tags = {
-        'img': 'src',
-        'script': 'src',
-        'link': 'href',
-        'a': 'href',
-        'video': 'src',
-        'audio': 'src',
-        'source': 'src'
-    }
-
-    for tag, attr in tags.items():
-        for resource in soup.find_all(tag):
-            src = resource.get(attr)
-            if not src or 'nofollow' in resource.attrs.get('rel', []):
-                continue
-            resource_url = urljoin(url, src)
-            resource_parsed_url = urlparse(resource_url)
-            resource_ext = os.path.splitext(resource_parsed_url.path)[1]
-
-            if include_types and resource_ext.lower() not in include_types:
-                continue
-
-            if resource_ext.lower() in RESOURCE_TYPES or tag == 'a':
-                resource_path = os.path.join(save_dir, sanitize_filename(resource_parsed_url.path.lstrip('/')))
-                make_dirs(os.path.dirname(resource_path))
-
-                if is_valid_url(resource_url) and resource_url not in visited:
-                    if resource_ext.lower() in RESOURCE_TYPES:
-                        download_queue.put((resource_url, resource_path))
-                        relative_path = os.path.relpath(resource_path, os.path.dirname(save_path))
-                        resource[attr] = relative_path.replace('\\', '/')
-                    elif tag == 'a' and follow_redirects:
-                        parse_and_download(resource_url, base_url, save_dir, visited, delay, max_depth, current_depth + 1, headers, timeout, verify_ssl, max_size, include_types, proxies, follow_redirects)
+    soup = BeautifulSoup(html_content, 'lxml', from_encoding=encoding)
+
+    # Döngü içinde global/öznitelik aramalarını önlemek için yerel kopyalar
+    tags = RESOURCE_TAGS
+    process_resource = _process_resource
+    dirname = os.path.dirname
+    relpath = os.path.relpath
+    page_dir = dirname(save_path)
+
+    # Sayfadaki indirmeler toplanıp kuyruğa tek seferde eklenir
+    downloads = []
+
+    # Özniteliği dolu kaynak etiketleri ağaç üzerinde tek geçişte toplanır
+    for resource in soup.find_all(_is_resource_tag):
+        tag = resource.name
+        attr = tags[tag]
+        src = resource[attr]
+        if 'nofollow' in resource.attrs.get('rel', []):
+            continue
+
+        processed = process_resource(src, tag, url, save_dir, include_types)
+        if processed is None:
+            continue
+        resource_url, resource_path, is_resource = processed
+        make_dirs(dirname(resource_path))
+
+        if is_resource:
+            relative_path = relpath(resource_path, page_dir)
+            resource[attr] = relative_path.replace('\\', '/')
+            # Aynı kaynağa kaç kez başvurulursa başvurulsun bu çalıştırmada bir kez indirilir
+            if visited.add_if_new(resource_url):
+                downloads.append((resource_url, resource_path))
+        elif tag == 'a' and follow_redirects and current_depth + 1 <= max_depth and resource_url not in visited:
+            html_queue.put((resource_url, current_depth + 1))
+
+    download_queue.put_many(downloads)
 
     save_path = sanitize_filename(save_path)
-    with open(save_path, 'w', encoding='utf-8') as file:
-        file.write(soup.prettify())
+    with open(save_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as file:
+        file.write(soup.prettify() if pretty else str(soup))
         logging.info(f"Kaydedildi: {save_path}")
 
-    time.sleep(delay)
+def html_worker(session, base_url, save_dir, visited, throttle, max_depth, timeout, verify_ssl, max_size, include_types, proxies, follow_redirects, pretty):
+    """HTML sayfalarını kuyruktan alıp genişlik öncelikli olarak tarar."""
+    while True:
+        url, depth = html_queue.get()
+        if url is None:
+            break
+        try:
+            parse_and_download(session, url, base_url, save_dir, visited, throttle, max_depth, depth, timeout, verify_ssl, max_size, include_types, proxies, follow_redirects, pretty)
+        except Exception as e:
+            logging.error(f"Sayfa işlenirken hata oluştu: {url} - Hata: {e}")
+        finally:
+            html_queue.task_done()
+
+def positive_int(value):
+    """argparse için 1 veya daha büyük tam sayı doğrulayıcısı."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 veya daha büyük bir değer olmalı: {value}")
+    return number
 
 def load_user_agents(file_path):
     """Belirtilen dosyadan User-Agent listesi yükler."""
@@ -201,10 +593,12 @@ def main():
                                      )
     parser.add_argument('url', help='Hedef web sitesi URL\'si')
     parser.add_argument('-d', '--dir', default='indirilen_site', help='Kaydedilecek dizin')
-    parser.add_argument('--delay', type=float, default=1.0, help='İstekler arası gecikme süresi (saniye)')
+    parser.add_argument('--delay', type=float, default=1.0, help='Aynı sunucuya yapılan sayfa istekleri arası gecikme süresi (saniye)')
+    parser.add_argument('--per-host', type=positive_int, help='Sunucu başına en fazla eşzamanlı istek sayısı (varsayılan: toplam iş parçacığı sayısı)')
     parser.add_argument('--depth', type=int, default=1, help='Maksimum tarama derinliği')
     parser.add_argument('--user-agent', default=DEFAULT_HEADERS['User-Agent'], help='Özel User-Agent tanımlama')
-    parser.add_argument('--threads', type=int, default=5, help='İndirme iş parçacığı sayısı')
+    parser.add_argument('--threads', type=positive_int, default=5, help='İndirme iş parçacığı sayısı')
+    parser.add_argument('--html-threads', type=positive_int, default=2, help='HTML sayfalarını tarayan iş parçacığı sayısı')
     parser.add_argument('--cookies', help='Özel çerezler (JSON formatında)')
     parser.add_argument('--timeout', type=int, default=10, help='İstek zaman aşımı süresi (saniye)')
     parser.add_argument('--no-verify-ssl', action='store_false', help='SSL sertifikası doğrulamasını atla')
@@ -214,7 +608,10 @@ def main():
     parser.add_argument('--random-user-agent', action='store_true', help='Her istek için rastgele User-Agent kullan')
     parser.add_argument('--user-agent-file', help='User-Agent listesi içeren dosya')
     parser.add_argument('--proxy', help='İstekleri bir proxy sunucusu üzerinden gönder (örneğin: http://proxyserver:port)')
+    parser.add_argument('--no-trust-env', action='store_false', dest='trust_env', help='Ortamdaki proxy/CA/.netrc ayarlarını yok say (istek başına ek yükü azaltır)')
+    parser.add_argument('--dns-ttl', type=int, default=300, help='DNS sonuçlarının önbellekte tutulma süresi (saniye, 0 kapatır)')
     parser.add_argument('--follow-redirects', action='store_true', help='İç bağlantıları takip et ve indir')
+    parser.add_argument('--pretty', action='store_true', help='Kaydedilen HTML dosyalarını girintili biçimde yaz')
 
     args = parser.parse_args()
 
@@ -246,28 +643,56 @@ def main():
         logging.error("Geçersiz URL. Lütfen doğru bir URL girin.")
         return
 
-    include_types = [f".{ext.strip()}" for ext in args.include_types.split(',')] if args.include_types else []
+    include_types = frozenset(f".{ext.strip().lstrip('.').lower()}" for ext in args.include_types.split(',')) if args.include_types else frozenset()
 
     make_dirs(args.dir)
-    visited = set()
+    visited = VisitedSet()
+    index = ResourceIndex(os.path.join(args.dir, INDEX_FILENAME))
+    index.load()
+    store = ContentStore()
+    per_host = args.per_host if args.per_host is not None else args.threads + args.html_threads
+    throttle = HostThrottle(per_host, args.delay)
+
+    if args.dns_ttl > 0:
+        install_dns_cache(args.dns_ttl)
+
+    # Tüm iş parçacıkları tek bir bağlantı havuzunu paylaşır
+    worker_count = args.threads + args.html_threads
+    session = create_session(headers, worker_count, worker_count, args.retry, args.trust_env)
+
+    # Bundan sonra başlatılan iş parçacıkları için daha küçük yığın adres alanı ayrılır
+    threading.stack_size(WORKER_STACK_SIZE)
 
     # İndirme iş parçacıklarını başlat
     threads = []
     for _ in range(args.threads):
-        thread = threading.Thread(target=download_worker, args=(headers, args.timeout, args.no_verify_ssl, args.max_size, proxies))
+        thread = threading.Thread(target=download_worker, args=(session, args.timeout, args.no_verify_ssl, args.max_size, proxies, index, store, throttle), daemon=True)
         thread.start()
         threads.append(thread)
 
-    parse_and_download(args.url, args.url, args.dir, visited, args.delay, args.depth, 0, headers, args.timeout, args.no_verify_ssl, args.max_size, include_types, proxies, args.follow_redirects)
+    # HTML tarama iş parçacıklarını başlat
+    html_threads = []
+    for _ in range(args.html_threads):
+        thread = threading.Thread(target=html_worker, args=(session, args.url, args.dir, visited, throttle, args.depth, args.timeout, args.no_verify_ssl, args.max_size, include_types, proxies, args.follow_redirects, args.pretty), daemon=True)
+        thread.start()
+        html_threads.append(thread)
+
+    html_queue.put((args.url, 0))
 
-    # Tüm indirmelerin tamamlanmasını bekleyin
+    # Önce tüm sayfaların taranmasını, ardından tüm indirmelerin tamamlanmasını bekleyin
+    html_queue.join()
     download_queue.join()
 
-    # İndirme iş parçacıklarını durdur
-    for _ in range(args.threads):
-        download_queue.put(None)
-    for thread in threads:
+    # İş parçacıklarını durdur
+    for _ in range(args.html_threads):
+        html_queue.put((None, None))
+    download_queue.close()
+    for thread in html_threads + threads:
         thread.join()
 
+    index.save()
+
+    session.close()
+
 if __name__ == '__main__':
     main()